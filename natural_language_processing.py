@@ -145,9 +145,6 @@ print(match.start(), match.end())
 # In[10]:
 
 
-# Import modules
-from nltk.tokenize import regexp_tokenize, TweetTokenizer
-
 # Create str variable
 french_text = "Tu viens me chercher STP 😀🙏"
 
@@ -160,12 +157,12 @@ print(all_words)
 
 
 # Tokenize only capital words
-capital_words = r"[A-Z|Ü]\w+"
-print(regexp_tokenize(french_text, capital_words))
+CAP_RE = re.compile(r"[A-ZÜ]\w+")
+print(CAP_RE.findall(french_text))
 
 # Tokenize only emojis
-emoji = "['\U0001F300-\U0001F5FF'|'\U0001F600-\U0001F64F'|'\U0001F680-\U0001F6FF'|'\u2600-\u26FF\u2700-\u27BF']"
-print(regexp_tokenize(french_text, emoji))
+EMOJI_RE = re.compile("[\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF\u2600-\u27BF]")
+print(EMOJI_RE.findall(french_text))
 
 
 # <i>Non-ASCII tokenization:</i> The above example demonstrates that tokenization is not limited to ASCII text. UTF character encodings (including emojis) can also be tokenized. This is useful in sentiment analysis, for example.
@@ -198,8 +195,10 @@ print("Prompts still there: " + str(lines[160:167]))
 
 
 # Remove prompts like 'TROILUS.', 'ACT 1' and '[Exit Pandarus.]' with regex
-pattern = "^\[(.*?)\]$|^[A-Z]{2,}.*|^Enter.*$"
-lines = [re.sub(pattern, '', l) for l in lines]
+# (one multiline substitution over the whole script instead of one per line)
+PROMPT_RE = re.compile(r"^(?:\[.*\]|[A-Z]{2,}.*|Enter.*)$", re.MULTILINE)
+troilus_body = PROMPT_RE.sub('', troilus)
+lines = troilus_body.split('\n')
 
 # Print lines again
 print("Prompts replaced with empty str: " + str(lines[160:167]))
@@ -213,16 +212,16 @@ import matplotlib.pyplot as plt
 import numpy as np
 get_ipython().run_line_magic('matplotlib', 'inline')
 
-# Tokenize each line
-tokenized_lines = [regexp_tokenize(s, r"\w+") for s in lines]
-
-# Make a frequency list of lengths
-line_num_words = [len(t_line) for t_line in tokenized_lines]
+# Tokenize each line and count its words straight into an array
+WORD_RE = re.compile(r"\w+")
+line_num_words = np.fromiter((len(WORD_RE.findall(s)) for s in lines),
+                             dtype=np.int32, count=len(lines))
 
 # Plot a histogram of sentence lengths with collection bin for high values
 bins = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 200]
+counts, _ = np.histogram(np.clip(line_num_words, bins[0], bins[-1]), bins=bins)
 plt.xlim([0, bins[-2] + 1])
-plt.hist(np.clip(line_num_words, bins[0], bins[-1]), bins=bins)
+plt.bar(bins[:-1], counts, width=np.diff(bins), align='edge')
 plt.gca().set(title = "Shakespeare\'s play \"Troilus and Cressida\" (c. 1602)", 
               xlabel = "Sentence length (in words)", ylabel = "Frequency")
 plt.show()
@@ -232,18 +231,6 @@ plt.show()
 
 # ## Text cleaning and topic identification <a class="anchor" id="fifth-bullet"></a>
 
-# In[16]:
-
-
-# Import William Shakespeare's play "Troilus and Cressida"
-filename = "data/troilus.txt"
-with open(filename, 'r') as file:
-    troilus = file.read()
-
-# Print the beginning of the text
-print(troilus[:400])
-
-
 # In[17]:
 
 
@@ -279,47 +266,50 @@ print(bow_simple.most_common(10))
 
 # Text cleaning with regex
 
-# Split the text into lines
-lines = troilus.split("\n")
-
-# Remove paragraphs we do not want to analyze (prompts 
-# like 'TROILUS.', 'ACT 1' and '[Exit Pandarus.]')
-pattern = "^\[(.*?)\]$|^[A-Z]{2,}.*|^Enter.*$"
-lines = [re.sub(pattern, '', l) for l in lines]
-
-# Recombine lines
-troilus_body = '\n'.join(lines)
+# Paragraphs we do not want to analyze (prompts like 'TROILUS.', 'ACT 1'
+# and '[Exit Pandarus.]') were already removed from troilus_body above
 print(troilus_body[:300])
 
 
 # <i>Text cleaning with regex:</i> The text (printed above) no longer contains prompts like 'TROILUS.', 'ACT 1' and '[Exit Pandarus.]'.
 
-# In[19]:
+# In[ ]:
 
 
-# Tokenize the text
-tokens = word_tokenize(troilus_body)
+# Pattern for the lowercase words that word_tokenize followed by the isalpha filter
+# keeps, in a single regex scan. Words touching a digit, an inner apostrophe or a
+# single hyphen are skipped ("o'er", "should'st", "well-known", "Pandarus-"), while
+# clitics, "cannot", quotes and double dashes are split off ("Hector's", "don't",
+# "'Hector'", "hill--Troy"). Elisions like "'tis" and "'twas" are skipped as well
+TOKEN_RE = re.compile(r"""
+    (?:(?<![\w'-]) | (?<=--) | (?<='') | (?<=\bcan)(?=not\b)
+       | (?<=(?<![\w'])')(?!(?:re|ve|ll|m|s|d|n)\b|t))
+    (?:can(?=not\b) | [^\W\d_]+?)
+    (?=(?:n't|'s|'m|'d|'ll|'re|'ve)?(?:(?![\w'-]) | (?=--) | '(?!\w))
+       | (?<=\bcan)(?=not\b))
+""", re.VERBOSE)
 
-# Convert the tokens into lowercase
-lower_tokens = [t.lower() for t in tokens]
-
-# Remove numbers and punctation
-alpha_only = [t for t in lower_tokens if t.isalpha()]
-
-# Remove stop words
+# Stop words
 english_stops = ['i','me','my','myself','we','our','ours','ourselves','you','your','yours','yourself','yourselves','he','him','his','himself','she','her','hers','herself','it','its','itself','they','them','their','theirs','themselves','what','which','who','whom','this','that','these','those','am','is','are','was','were','be','been','being','have','has','had','having','do','does','did','doing','a','an','the','and','but','if','or','because','as','until','while','of','at','by','for','with','about','against','between','into','through','during','before','after','above','below','to','from','up','down','in','out','on','off','over','under','again','further','then','once','here','there','when','where','why','how','all','any','both','each','few','more','most','other','some','such','no','nor','not','only','own','same','so','than','too','very','s','t','can','will','just','don','should','now','d','ll','m','o','re','ve','y','ain','aren','couldn','didn','doesn','hadn','hasn','haven','isn','ma','mightn','mustn','needn','shan','shouldn','wasn','weren','won','']
 earlymodern_stops = ['art','doth','dost','\'ere','hast','hath','hence','hither','nigh','oft','should\'st','thither','tither','thee','thou','thine','thy','\'tis','\'twas','wast','whence','wherefore','whereto','withal','would\'st','ye','yon','yonder']
-no_stops = [t for t in alpha_only if t not in (english_stops + earlymodern_stops)]
+STOPWORDS = frozenset(english_stops) | frozenset(earlymodern_stops)
 
-# Instantiate the WordNetLemmatizer
+# Import modules
+from functools import lru_cache
+from itertools import filterfalse
 from nltk.stem import WordNetLemmatizer
+
+# Instantiate the WordNetLemmatizer
 wordnet_lemmatizer = WordNetLemmatizer()
 
-# Lemmatize all tokens into a new list (sort words by grouping inflected or variant forms of the same word)
-lemmatized = [wordnet_lemmatizer.lemmatize(t) for t in no_stops]
+# Cache lemmas so each unique word is looked up in WordNet only once
+lemmatize = lru_cache(maxsize=None)(wordnet_lemmatizer.lemmatize)
 
-# Create the bag-of-words
-bow = Counter(lemmatized)
+# Stream the tokens of the cleaned script (read once above) through stop word removal
+# and lemmatization (sort words by grouping inflected or variant forms of the same word)
+# into the bag-of-words, without building a token list
+alpha_only = (m.group() for m in TOKEN_RE.finditer(troilus_body.lower()))
+bow = Counter(map(lemmatize, filterfalse(STOPWORDS.__contains__, alpha_only)))
 
 print("Most common tokens: " + str(bow.most_common(20)))
 
@@ -334,11 +324,16 @@ print("Most common tokens: " + str(bow.most_common(20)))
 
 
 # Import modules
+import os
+import hashlib
 import requests
+from requests.exceptions import HTTPError
+from concurrent.futures import ThreadPoolExecutor
+from itertools import filterfalse
 import bs4
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
 from gensim.corpora.dictionary import Dictionary
+from gensim.corpora.mmcorpus import MmCorpus
+from gensim.utils import simple_preprocess
 
 
 # In[21]:
@@ -359,14 +354,37 @@ urls = ["https://en.wikipedia.org/wiki/Revenue",
         "https://en.wikipedia.org/wiki/Employee_engagement"
         ]
 
+# Folder for caching downloaded articles between runs
+cache_dir = "data/articles"
+os.makedirs(cache_dir, exist_ok=True)
+
+# Get the HTML of a web article from the cache, or from the web if it is not
+# cached yet (raise an error if the query failed)
+def get_article(url):
+    cache_file = os.path.join(cache_dir, url.rsplit("/", 1)[-1] + ".html")
+    if os.path.exists(cache_file):
+        with open(cache_file, 'rb') as file:
+            return file.read()
+    r = requests.get(url, timeout=10)
+    r.raise_for_status()
+
+    # Write to a temporary file first so an interrupted run leaves no truncated article
+    with open(cache_file + ".tmp", 'wb') as file:
+        file.write(r.content)
+    os.replace(cache_file + ".tmp", cache_file)
+    return r.content
+
+# Get web articles concurrently (threads wait on the network in parallel)
+with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+    futures = [executor.submit(get_article, url) for url in urls]
+
 # Create list variable for GET query results
 responses = []
 
-# Get web articles
-for url in urls:
+# Collect the query results in the order of urls
+for future in futures:
     try:
-        r = requests.get(url)
-        r.raise_for_status()
+        r = future.result()
     except HTTPError as http_err:
         print(f'HTTP error occurred: {http_err}')
     except Exception as err:
@@ -378,47 +396,53 @@ for url in urls:
         
 print("Number of articles retrieved: " + str(len(responses)))
 
+# Key for the saved dictionary and corpus (changes whenever the retrieved articles change)
+articles_key = hashlib.sha1(b"".join(hashlib.sha1(c).digest() for c in responses)).hexdigest()
+
 
 # If the GET query fails for an URL, the code above will skip the unresponsive URL and try next URL. The result is a list of length *n* containing the query results, where *n* equals the number of articles that were retrieved successfully.
 
-# In[22]:
+# In[ ]:
 
 
 # Create list variable for document tokens
-articles = []
-articles_text = []
+article_tokens = []
 
-# Extract text, clean text, tokenize and lemmatize for each article
-for r in responses:
+# Stop words are shared by all articles, so create them once
+english_stops = ['i','me','my','myself','we','our','ours','ourselves','you','your','yours','yourself','yourselves','he','him','his','himself','she','her','hers','herself','it','its','itself','they','them','their','theirs','themselves','what','which','who','whom','this','that','these','those','am','is','are','was','were','be','been','being','have','has','had','having','do','does','did','doing','a','an','the','and','but','if','or','because','as','until','while','of','at','by','for','with','about','against','between','into','through','during','before','after','above','below','to','from','up','down','in','out','on','off','over','under','again','further','then','once','here','there','when','where','why','how','all','any','both','each','few','more','most','other','some','such','no','nor','not','only','own','same','so','than','too','very','s','t','can','will','just','don','should','now','d','ll','m','o','re','ve','y','ain','aren','couldn','didn','doesn','hadn','hasn','haven','isn','ma','mightn','mustn','needn','shan','shouldn','wasn','weren','won','']
+ARTICLE_STOPS = frozenset(english_stops)
+
+# Skip the processing if a previous run saved the dictionary and corpus of exactly
+# these articles (the dictionary is saved last, so it marks a complete save)
+dictionary_file = f"data/articles_{articles_key}.dict"
+corpus_file = f"data/articles_{articles_key}.mm"
+cached = os.path.exists(dictionary_file)
+if cached:
+    print("Using the dictionary and corpus saved for these articles")
+else:
+    # Extract text, clean text and tokenize each article
+    for i, content in enumerate(responses):
     
-    # Extract text from HTML
-    html = bs4.BeautifulSoup(r.text, 'html.parser')
-    paragraphs = html.select("p")
-    text = '\n'.join([ para.text for para in paragraphs])
-    articles_text.append(text)
+        # Extract text from HTML
+        html = bs4.BeautifulSoup(content, 'lxml')
+        paragraphs = html.find_all("p")
+        text = '\n'.join(para.get_text() for para in paragraphs)
     
-    # Tokenize the text
-    tokens = word_tokenize(text)
-
-    # Convert the tokens into lowercase
-    lower_tokens = [t.lower() for t in tokens]
-
-    # Remove numbers and punctation
-    alpha_only = [t for t in lower_tokens if t.isalpha()]
-
-    # Remove stop words
-    english_stops = ['i','me','my','myself','we','our','ours','ourselves','you','your','yours','yourself','yourselves','he','him','his','himself','she','her','hers','herself','it','its','itself','they','them','their','theirs','themselves','what','which','who','whom','this','that','these','those','am','is','are','was','were','be','been','being','have','has','had','having','do','does','did','doing','a','an','the','and','but','if','or','because','as','until','while','of','at','by','for','with','about','against','between','into','through','during','before','after','above','below','to','from','up','down','in','out','on','off','over','under','again','further','then','once','here','there','when','where','why','how','all','any','both','each','few','more','most','other','some','such','no','nor','not','only','own','same','so','than','too','very','s','t','can','will','just','don','should','now','d','ll','m','o','re','ve','y','ain','aren','couldn','didn','doesn','hadn','hasn','haven','isn','ma','mightn','mustn','needn','shan','shouldn','wasn','weren','won','']
-    no_stops = [t for t in alpha_only if t not in english_stops]
-
-    # Lemmatize all tokens into a new list
-    wordnet_lemmatizer = WordNetLemmatizer()
-    lemmatized = [wordnet_lemmatizer.lemmatize(t) for t in no_stops]
+        # Print the beginning of the article
+        print(f"Article {i}: {text[:70]}")
     
-    # Append lemmatized to list of document tokens
-    articles.append(lemmatized)
+        # Tokenize the text into lowercase words without accents, skipping numbers,
+        # punctuation and single letters (max_len keeps long words like "entrepreneurship")
+        alpha_only = simple_preprocess(text, deacc=True, min_len=2, max_len=50)
 
-# Print the beginning of each article
-x = [print("Article " + str(i) + ": " + t[:70]) for i,t in enumerate(articles_text)]
+        # Remove stop words and append to list of document tokens
+        article_tokens.append(list(filterfalse(ARTICLE_STOPS.__contains__, alpha_only)))
+
+    # Lemmatize each unique word of all articles once (with the lemma cache created for
+    # "Troilus and Cressida" above), then lemmatize the documents
+    vocab = set().union(*article_tokens)
+    lemma_map = {t: lemmatize(t) for t in vocab}
+    articles = [[lemma_map[t] for t in tokens] for tokens in article_tokens]
 
 
 # The 12 articles above are all related to business performance. For each of the articles we downloaded the HTML, extracted the text from HTML, cleaned the text, tokenized and lemmatized the tokens. Finally, we combined the result in a list variable. Next, we will create a corpus of these articles, and perform queries on the corpus.
@@ -426,8 +450,11 @@ x = [print("Article " + str(i) + ": " + t[:70]) for i,t in enumerate(articles_te
 # In[23]:
 
 
-# Create a Dictionary from the articles
-dictionary = Dictionary(articles)
+# Load the saved Dictionary, or create it from the articles
+if cached:
+    dictionary = Dictionary.load(dictionary_file)
+else:
+    dictionary = Dictionary(articles)
 
 # Select the id for "cost"
 cost_id = dictionary.token2id.get("cost")
@@ -436,48 +463,54 @@ cost_id = dictionary.token2id.get("cost")
 print(dictionary.get(cost_id))
 
 
-# In[24]:
+# In[ ]:
 
 
-# Create a MmCorpus: corpus
-corpus = [dictionary.doc2bow(article) for article in articles]
+# Create a MmCorpus: corpus (and save the Dictionary for the next run afterwards)
+if not cached:
+    MmCorpus.serialize(corpus_file, (dictionary.doc2bow(article) for article in articles),
+                       id2word=dictionary)
+    dictionary.save(dictionary_file + ".tmp")
+    os.replace(dictionary_file + ".tmp", dictionary_file)
+corpus = MmCorpus(corpus_file)
 
 # Print the first 10 word ids with their frequency counts from the third document
-print(corpus[3][:10])
+# (MmCorpus reads counts back as floats)
+print([(word_id, int(word_count)) for word_id, word_count in corpus[3][:10]])
 
 
-# In[25]:
+# In[ ]:
 
 
 # Gensim bag-of-words
 
 # Import modules
-from collections import defaultdict
-import itertools
+from collections import Counter
+import heapq
+from operator import itemgetter
 
 # Save the third document
 doc = corpus[2]
 
-# Sort the doc for frequency
-bow_doc = sorted(doc, key=lambda w: w[1], reverse=True)
+# Select the most frequent words of the doc (without sorting the whole doc)
+bow_doc = heapq.nlargest(5, doc, key=itemgetter(1))
 
 # Print the most frequently occurring words in the third document
-for word_id, word_count in bow_doc[:5]:
-    print(dictionary.get(word_id), word_count)
+for word_id, word_count in bow_doc:
+    print(dictionary.get(word_id), int(word_count))
 
 
-# In[26]:
+# In[ ]:
 
 
-# Create the defaultdict
-total_word_count = defaultdict(int)
-for word_id, word_count in itertools.chain.from_iterable(corpus):
-    total_word_count[word_id] += word_count
+# Count words over all documents in the corpus
+total_word_count = Counter()
+for doc in corpus:
+    total_word_count.update(dict(doc))
 
 # Print the most frequently occurring words in the corpus dictionary
-w2cSorted = dict(sorted(total_word_count.items(), key=lambda x: x[1],reverse=True)[:10])
-for word_id in w2cSorted:
-    print(dictionary.get(word_id), w2cSorted[word_id])
+for word_id, word_count in total_word_count.most_common(10):
+    print(dictionary.get(word_id), int(word_count))
 
 
 # <i>Text corpus of business performance articles: </i> Word counts on the whole corpus (above) suggest that 'customer', 'company' and 'revenue' are the most important concepts discussed in these 12 articles.